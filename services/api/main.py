@@ -5,15 +5,48 @@ Minimal working version for local Kubernetes deployment.
 """
 
 import asyncio
-import aiohttp
-import xml.etree.ElementTree as ET
-from datetime import datetime
-from typing import List, Dict, Optional
-from fastapi import FastAPI, HTTPException
+import logging
+import logging.config
+import logging.handlers
+import queue
+import time
+import httpx
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from enum import Enum
+from typing import List, Dict, Optional, Tuple
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from lxml import etree
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 import os
 
+# Logging: handlers only enqueue records; a listener thread does the stream I/O.
+# Applied in lifespan rather than at import so importing the module has no side effects.
+LOG_QUEUE = queue.SimpleQueue()
+LOG_LISTENER = logging.handlers.QueueListener(LOG_QUEUE, logging.StreamHandler())
+LOGGING_CONFIG = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "default": {"format": "%(asctime)s %(levelname)s %(name)s: %(message)s"}
+    },
+    "handlers": {
+        "queue": {"()": logging.handlers.QueueHandler, "queue": LOG_QUEUE, "formatter": "default"}
+    },
+    "loggers": {
+        # httpx logs every request at INFO, which is too chatty for the hot path
+        "httpx": {"level": "WARNING"}
+    },
+    "root": {"level": "INFO", "handlers": ["queue"]}
+}
+logger = logging.getLogger(__name__)
+
 # Models
 class NewsItem(BaseModel):
     title: str
@@ -27,13 +60,47 @@ class HealthResponse(BaseModel):
     timestamp: datetime
     version: str
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Set up and tear down app-wide resources.
+
+    Runs the log listener, sizes the default executor used for RSS parsing,
+    and shares one pooled HTTP client for the lifetime of the app.
+    """
+    logging.config.dictConfig(LOGGING_CONFIG)
+    LOG_LISTENER.start()
+    # Sized worker pool for RSS parsing offloaded via asyncio.to_thread
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=8))
+    app.state.client = httpx.AsyncClient(
+        # One HTTP/2 connection multiplexes all feeds on feeds.bbci.co.uk
+        transport=httpx.AsyncHTTPTransport(
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=75),
+            # Binding to 0.0.0.0 keeps connections on IPv4, avoiding IPv6 fallback delays
+            local_address="0.0.0.0"
+        ),
+        # httpx decompresses gzip/brotli bodies transparently
+        headers={"Accept-Encoding": "gzip, br"},
+        follow_redirects=True
+    )
+    try:
+        yield
+    finally:
+        await app.state.client.aclose()
+        LOG_LISTENER.stop()
+
 # App Configuration
 app = FastAPI(
     title="PravdaPlus API",
     description="Simple news transformation API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
+# Compress larger JSON responses such as /news
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -45,123 +112,193 @@ app.add_middleware(
 
 # BBC RSS Feed URLs
 BBC_FEEDS = {
-    "world": "http://feeds.bbci.co.uk/news/world/rss.xml",
-    "uk": "http://feeds.bbci.co.uk/news/uk/rss.xml", 
-    "business": "http://feeds.bbci.co.uk/news/business/rss.xml",
-    "technology": "http://feeds.bbci.co.uk/news/technology/rss.xml",
-    "health": "http://feeds.bbci.co.uk/news/health/rss.xml",
+    "world": "https://feeds.bbci.co.uk/news/world/rss.xml",
+    "uk": "https://feeds.bbci.co.uk/news/uk/rss.xml", 
+    "business": "https://feeds.bbci.co.uk/news/business/rss.xml",
+    "technology": "https://feeds.bbci.co.uk/news/technology/rss.xml",
+    "health": "https://feeds.bbci.co.uk/news/health/rss.xml",
 }
 
-async def fetch_bbc_feed(session: aiohttp.ClientSession, category: str, feed_url: str, max_articles: int = 10) -> List[NewsItem]:
-    """Fetch articles from a BBC RSS feed."""
+# Valid feed categories, validated by FastAPI before the handler runs.
+# Built from BBC_FEEDS so the feed map stays the single list of categories.
+Category = Enum("Category", {name: name for name in BBC_FEEDS}, type=str)
+
+# Raw (title, description, link, pubDate) fields extracted from one RSS item
+RssRow = Tuple[str, str, str, Optional[str]]
+
+def parse_rss_chunk(parser: etree.XMLPullParser, chunk: bytes, max_rows: int) -> List[RssRow]:
+    """Feed a chunk to the pull parser and return up to max_rows completed items.
+
+    Does only lxml work so it can run in a worker thread.
+    """
+    parser.feed(chunk)
+    rows = []
+    for _, item in parser.read_events():
+        if len(rows) >= max_rows:
+            break
+        
+        title = item.findtext("title")
+        description = item.findtext("description")
+        link = item.findtext("link")
+        
+        if title is not None and description is not None and link is not None:
+            rows.append((title.strip(), description.strip(), link.strip(), item.findtext("pubDate")))
+        
+        # Free parsed items so memory stays flat regardless of feed size
+        item.clear()
+        while item.getprevious() is not None:
+            del item.getparent()[0]
+    
+    return rows
+
+def parse_pub_date(date_str: Optional[str]) -> datetime:
+    """Parse an RSS pubDate as an aware UTC-based datetime, falling back to now."""
+    if not date_str:
+        return datetime.now(timezone.utc)
     try:
-        async with session.get(feed_url, timeout=aiohttp.ClientTimeout(total=30)) as response:
-            if response.status != 200:
-                return []
-            xml_content = await response.text()
-            root = ET.fromstring(xml_content)
-            
-            items = root.findall(".//item")
-            articles = []
-            
-            for item in items[:max_articles]:
-                title = item.find("title")
-                description = item.find("description")
-                link = item.find("link")
-                pub_date = item.find("pubDate")
+        # BBC uses RFC 2822 format, including the timezone suffix
+        parsed_date = parsedate_to_datetime(date_str)
+    except (TypeError, ValueError):
+        return datetime.now(timezone.utc)
+    # "-0000" dates parse as naive; treat them as UTC
+    return parsed_date if parsed_date.tzinfo is not None else parsed_date.replace(tzinfo=timezone.utc)
+
+# Upper bound on one whole feed fetch, including a slowly streamed body
+FEED_FETCH_TIMEOUT = 30.0
+
+async def fetch_bbc_feed(client: httpx.AsyncClient, category: str, feed_url: str, max_articles: int = 10) -> List[NewsItem]:
+    """Fetch articles from a BBC RSS feed, parsing the body as it streams in."""
+    try:
+        async with asyncio.timeout(FEED_FETCH_TIMEOUT):
+            async with client.stream("GET", feed_url, timeout=FEED_FETCH_TIMEOUT) as response:
+                if response.status_code != 200:
+                    return []
                 
-                if title is not None and description is not None and link is not None:
-                    # Parse date
-                    date_str = pub_date.text if pub_date is not None else None
-                    try:
-                        # BBC uses RFC 2822 format
-                        parsed_date = datetime.strptime(date_str[:25], "%a, %d %b %Y %H:%M:%S") if date_str else datetime.now()
-                    except:
-                        parsed_date = datetime.now()
-                    
-                    articles.append(NewsItem(
-                        title=title.text.strip(),
-                        description=description.text.strip(),
-                        link=link.text.strip(),
-                        pub_date=parsed_date,
-                        category=category
-                    ))
-            
-            return articles
-    except Exception as e:
-        print(f"Error fetching {category} feed: {e}")
+                parser = etree.XMLPullParser(events=("end",), tag="item", resolve_entities=False)
+                articles = []
+                async for chunk in response.aiter_bytes(16384):
+                    # Parse in a worker thread so the event loop keeps serving requests
+                    rows = await asyncio.to_thread(parse_rss_chunk, parser, chunk, max_articles - len(articles))
+                    articles.extend(
+                        NewsItem(title=title, description=description, link=link, pub_date=parse_pub_date(date_str), category=category)
+                        for title, description, link, date_str in rows
+                    )
+                    if len(articles) >= max_articles:
+                        # Leaving the stream context closes the response, dropping the rest of the feed
+                        break
+                
+                return articles
+    except Exception:
+        logger.exception("Error fetching %s feed", category)
         return []
 
-@app.get("/health", response_model=HealthResponse)
+FEED_CACHE_TTL = 60
+# Per-feed time budget for the all-categories endpoint
+FEED_FANOUT_TIMEOUT = 5.0
+# Parsed feeds keyed by (category, max_articles) -> (fetched_at, fetch task).
+# In-flight tasks are shared so concurrent identical requests hit BBC once.
+FEED_CACHE: Dict[Tuple[str, int], Tuple[float, "asyncio.Task[List[NewsItem]]"]] = {}
+
+def _evict_failed_fetch(key: Tuple[str, int], task: "asyncio.Task[List[NewsItem]]") -> None:
+    """Drop empty or failed results so the next request retries upstream."""
+    if task.cancelled() or task.exception() is not None or not task.result():
+        entry = FEED_CACHE.get(key)
+        if entry is not None and entry[1] is task:
+            del FEED_CACHE[key]
+
+async def get_cached_feed(client: httpx.AsyncClient, category: str, feed_url: str, max_articles: int = 10) -> List[NewsItem]:
+    """Return a feed from the TTL cache, fetching it at most once per expiry."""
+    key = (category, max_articles)
+    now = time.monotonic()
+    entry = FEED_CACHE.get(key)
+    # Expired results are refetched, and so is an in-flight fetch that has run
+    # past the TTL (well beyond FEED_FETCH_TIMEOUT), so a hung request cannot pin the key
+    if entry is None or now - entry[0] >= FEED_CACHE_TTL:
+        # Prune expired entries before inserting so the cache stays bounded
+        for stale_key in [k for k, (ts, t) in FEED_CACHE.items() if t.done() and now - ts >= FEED_CACHE_TTL]:
+            del FEED_CACHE[stale_key]
+        task = asyncio.create_task(fetch_bbc_feed(client, category, feed_url, max_articles))
+        task.add_done_callback(lambda t: _evict_failed_fetch(key, t))
+        entry = (now, task)
+        FEED_CACHE[key] = entry
+    # Shield so a disconnecting client does not cancel the shared fetch
+    return await asyncio.shield(entry[1])
+
+def set_feed_cache_control(response: Response, cacheable: bool) -> None:
+    """Let downstream caches keep complete feed responses, but never empty or failed ones."""
+    response.headers["Cache-Control"] = f"public, max-age={FEED_CACHE_TTL}" if cacheable else "no-store"
+
+@app.get("/health", responses={200: {"model": HealthResponse}})
 async def health_check():
     """Health check endpoint."""
-    return HealthResponse(
-        status="healthy",
-        timestamp=datetime.now(),
-        version="1.0.0"
-    )
+    # Probed constantly, so skip model validation and serialize the dict directly
+    return ORJSONResponse({
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "version": "1.0.0"
+    })
 
 @app.get("/news/{category}", response_model=List[NewsItem])
-async def get_news_by_category(category: str, limit: int = 10):
+async def get_news_by_category(request: Request, response: Response, category: Category, limit: int = Query(10, ge=1, le=50)):
     """Get news articles by category."""
-    if category not in BBC_FEEDS:
-        raise HTTPException(status_code=404, detail=f"Category '{category}' not found")
-    
-    async with aiohttp.ClientSession() as session:
-        articles = await fetch_bbc_feed(session, category, BBC_FEEDS[category], limit)
-        return articles
+    client = request.app.state.client
+    articles = await get_cached_feed(client, category.value, BBC_FEEDS[category.value], limit)
+    set_feed_cache_control(response, bool(articles))
+    return articles
 
 @app.get("/news", response_model=Dict[str, List[NewsItem]])
-async def get_all_news(limit: int = 5):
+async def get_all_news(request: Request, response: Response, limit: int = Query(5, ge=1, le=50)):
     """Get news from all categories."""
-    async with aiohttp.ClientSession() as session:
-        tasks = []
-        for category, feed_url in BBC_FEEDS.items():
-            tasks.append(fetch_bbc_feed(session, category, feed_url, limit))
-        
-        results = await asyncio.gather(*tasks)
-        
-        return {
-            category: articles
-            for category, articles in zip(BBC_FEEDS.keys(), results)
-        }
+    client = request.app.state.client
+    tasks = []
+    for category, feed_url in BBC_FEEDS.items():
+        tasks.append(asyncio.wait_for(
+            get_cached_feed(client, category, feed_url, limit),
+            timeout=FEED_FANOUT_TIMEOUT
+        ))
+    
+    # A slow or failing feed yields an empty list instead of stalling the rest
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    # Partial responses (a feed timed out, failed or came back empty) must not be cached downstream
+    partial = any(isinstance(articles, BaseException) or not articles for articles in results)
+    set_feed_cache_control(response, not partial)
+    
+    return {
+        category: [] if isinstance(articles, BaseException) else articles
+        for category, articles in zip(BBC_FEEDS.keys(), results)
+    }
 
 class TransformRequest(BaseModel):
     article: NewsItem
     style: str = "satirical"
 
 @app.post("/transform")
-async def transform_article(request: TransformRequest):
+async def transform_article(request: TransformRequest, http_request: Request):
     """Transform a news article using the AI transformer service."""
     try:
         transformer_url = os.getenv("TRANSFORMER_URL", "http://transformer-service:8002")
+        client = http_request.app.state.client
         
-        async with aiohttp.ClientSession() as session:
-            article_data = request.article.dict()
-            # Convert datetime to string for JSON serialization
-            article_data["pub_date"] = article_data["pub_date"].isoformat()
-            
-            payload = {
-                "article": article_data,
-                "style": request.style
-            }
+        payload = {
+            "article": request.article.model_dump(mode="json"),
+            "style": request.style
+        }
+        
+        response = await client.post(
+            f"{transformer_url}/transform",
+            content=orjson.dumps(payload),
+            headers={"Content-Type": "application/json"},
+            timeout=60.0
+        )
+        if response.status_code == 200:
+            return response.json()
+        else:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Transformer service error: {response.text}"
+            )
             
-            async with session.post(
-                f"{transformer_url}/transform",
-                json=payload,
-                timeout=aiohttp.ClientTimeout(total=60)
-            ) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    return result
-                else:
-                    error_text = await response.text()
-                    raise HTTPException(
-                        status_code=response.status,
-                        detail=f"Transformer service error: {error_text}"
-                    )
-                    
-    except asyncio.TimeoutError:
+    except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="Transformer service timeout")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Transformation failed: {str(e)}")
@@ -183,4 +320,12 @@ async def root():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 2)),
+        access_log=False
+    )
\ No newline at end of file